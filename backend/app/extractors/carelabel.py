@@ -1,94 +1,90 @@
-import os
 import re
-from typing import Any
+from functools import partial
+from typing import Any, Iterator
 
 import fitz  # PyMuPDF
-from PIL import Image
 
 from .common import (
-    extract_upc_candidate,
-    extract_valid_upc,
+    extract_header_fields,
+    file_digest,
+    find_upc,
+    first_page_text,
+    iter_pages,
     normalize_text,
-    ocr_image,
-    render_page_image,
+    page_document,
+    read_columns,
 )
 
+_SIZES = ("XXXL", "XXL", "XL", "L", "M", "S", "XS")
+_SIZE_RE = re.compile(rf"\b({'|'.join(_SIZES)})\b", re.ASCII)
+_SIZE_RANGE_RES = {size: re.compile(rf"{size}\s*\(([^)]+)\)", re.ASCII) for size in _SIZES}
+_NUMERIC_SIZE_RE = re.compile(r"\b(\d{1,2}\s*-\s*\d{1,2}|\d{1,2})\b", re.ASCII)
+_COUNTRY_RE = re.compile(r"(?:Made In|Hecho En)\s+([A-Za-z ]+)", re.IGNORECASE)
+_COMP_RE = re.compile(r"(\d{1,3})%\s*([A-Za-z][A-Za-z\s/&-]+)")
+_RN_RE = re.compile(r"RN#?\s*(\d+)", re.ASCII)
+_EXCLUSIVE_RE = re.compile(r"Exclusive of Decoration", re.ASCII | re.IGNORECASE)
+_PARENT_COLOR_RE = re.compile(r"\b(BLACK\s+SOOT|BLAC\s+SOOT|SALSA\s+DELIGHT)\b", re.ASCII | re.IGNORECASE)
+_STYLE_RE = re.compile(r"\b(AV[A-Z0-9]+)\b", re.ASCII)
+
+_SIZE_RANGE_MAP = {
+    "0-2": "XS",
+    "4-6": "S",
+    "8-10": "M",
+    "12-14": "L",
+    "16-18": "XL",
+    "20": "XXL",
+    "22": "XXXL",
+}
+
 
 def _extract_size(normalized: str) -> tuple[str, str]:
-    size_match = re.search(r"\b(XXXL|XXL|XL|L|M|S|XS)\b", normalized)
+    size_match = _SIZE_RE.search(normalized)
     size_range = ""
     if size_match:
-        range_match = re.search(rf"{size_match.group(1)}\s*\(([^)]+)\)", normalized)
+        range_match = _SIZE_RANGE_RES[size_match.group(1)].search(normalized)
         if range_match:
             size_range = range_match.group(1)
         return size_match.group(1), size_range
-    range_match = re.search(r"\b(\d{1,2}\s*-\s*\d{1,2}|\d{1,2})\b", normalized)
+    range_match = _NUMERIC_SIZE_RE.search(normalized)
     if range_match:
         size_range = range_match.group(1).replace(" ", "")
-        range_map = {
-            "0-2": "XS",
-            "4-6": "S",
-            "8-10": "M",
-            "12-14": "L",
-            "16-18": "XL",
-            "20": "XXL",
-            "22": "XXXL",
-        }
-        return range_map.get(size_range, ""), size_range
+        return _SIZE_RANGE_MAP.get(size_range, ""), size_range
     return "", ""
 
 
 def _extract_country(text: str) -> str:
-    match = re.search(r"(?:Made In|Hecho En)\s+([A-Za-z ]+)", text, re.IGNORECASE)
+    match = _COUNTRY_RE.search(text)
     if match:
         return match.group(1).strip()
     return ""
 
 
 def _extract_composition(text: str) -> list[dict[str, Any]]:
-    compositions: list[dict[str, Any]] = []
-    for match in re.finditer(r"(\d{1,3})%\s*([A-Za-z][A-Za-z\s/&-]+)", text):
-        pct = int(match.group(1))
-        material = " ".join(match.group(2).split()).strip(" .;/")
-        if material:
-            compositions.append({"percent": pct, "material": material})
-    return compositions
+    # Runs on the raw text: normalize_text joins a digit ending one line to
+    # the percentage starting the next. The material always starts with a
+    # letter, so it is never empty after trimming.
+    return [
+        {"percent": int(match[1]), "material": " ".join(match[2].split()).strip(" .;/")}
+        for match in _COMP_RE.finditer(text)
+    ]
 
 
-def extract_parent_info(pdf_path: str) -> dict[str, Any]:
-    doc = fitz.open(pdf_path)
-    page = doc[0]
-    text = page.get_text() or ""
-    if len(text.strip()) < 20:
-        text = f"{text}\n{ocr_image(render_page_image(page))}"
-    parent_info: dict[str, Any] = {}
+def _has_upc_and_size(text: str) -> bool:
     normalized = normalize_text(text)
+    return bool(find_upc(normalized)[0] and _extract_size(normalized)[0])
 
-    ref_match = re.search(r"Reference #:\s*([^\n]+)", text)
-    if ref_match:
-        parent_info["reference"] = ref_match.group(1).strip()
-
-    job_match = re.search(r"Job #:\s*([^\n]+)", text)
-    if job_match:
-        parent_info["job_number"] = job_match.group(1).strip()
-
-    style_match = re.search(r"Style #:\s*([^\n]+)", text)
-    if style_match:
-        parent_info["style_number"] = style_match.group(1).strip()
 
-    po_match = re.search(r"PO #:\s*([^\n]+)", text)
-    if po_match:
-        parent_info["po_number"] = po_match.group(1).strip()
+def extract_parent_info(pdf_path: str, page_text: str | None = None) -> dict[str, Any]:
+    text = first_page_text(pdf_path) if page_text is None else page_text
+    parent_info: dict[str, Any] = {}
+    normalized = normalize_text(text)
 
-    date_match = re.search(r"Date:\s*([^\n]+)", text)
-    if date_match:
-        parent_info["date"] = date_match.group(1).strip()
+    parent_info.update(extract_header_fields(text))
 
-    color_match = re.search(r"\b(BLACK\s+SOOT|BLAC\s+SOOT|SALSA\s+DELIGHT)\b", normalized, re.IGNORECASE)
+    color_match = _PARENT_COLOR_RE.search(normalized)
     if color_match:
         parent_info["color"] = color_match.group(1).upper().replace("  ", " ")
 
-    doc.close()
     return parent_info
 
 
@@ -102,17 +98,15 @@ def extract_care_label_info(text: str) -> dict[str, Any]:
     if size_range:
         info["size_range"] = size_range
 
-    rn_match = re.search(r"RN#?\s*(\d+)", normalized)
+    rn_match = _RN_RE.search(normalized)
     if rn_match:
         info["rn_number"] = rn_match.group(1)
 
-    upc = extract_valid_upc(normalized)
+    upc, candidate = find_upc(normalized)
     if upc:
         info["upc"] = upc
-    else:
-        candidate = extract_upc_candidate(normalized)
-        if candidate:
-            info["upc_candidate"] = candidate
+    elif candidate:
+        info["upc_candidate"] = candidate
 
     country = _extract_country(text)
     if country:
@@ -122,31 +116,33 @@ def extract_care_label_info(text: str) -> dict[str, Any]:
     if compositions:
         info["composition"] = compositions
 
-    if re.search(r"Exclusive of Decoration", text, re.IGNORECASE):
+    if _EXCLUSIVE_RE.search(text):
         info["exclusive_of_decoration"] = True
 
-    style_match = re.search(r"\b(AV[A-Z0-9]+)\b", normalized)
+    style_match = _STYLE_RE.search(normalized)
     if style_match:
         info["style_number"] = style_match.group(1)
 
     return info
 
 
-def extract_care_labels(
+def _extract_page_labels(
     pdf_path: str,
-    columns: int = 8,
-    skip_first_column: bool = True,
-    zoom: float = 3.0,
-    column_width: float = 88.0,
-    left_offset: float = 45.0,
-    top_ratio: float = 0.22,
-    bottom_ratio: float = 0.61,
-) -> dict[str, Any]:
-    doc = fitz.open(pdf_path)
-    mat = fitz.Matrix(zoom, zoom)
-    labels: list[dict[str, Any]] = []
+    page_num: int,
+    columns: int,
+    skip_first_column: bool,
+    matrix: fitz.Matrix,
+    column_width: float,
+    left_offset: float,
+    top_ratio: float,
+    bottom_ratio: float,
+    cache_dir: str | None,
+    pdf_digest: str,
+) -> list[dict[str, Any]]:
+    with page_document(pdf_path) as doc:
+        page = doc[page_num]
+        labels: list[dict[str, Any]] = []
 
-    for page_num, page in enumerate(doc):
         page_rect = page.rect
         page_width = page_rect.width
         page_height = page_rect.height
@@ -156,6 +152,7 @@ def extract_care_labels(
         bottom_y = page_height * bottom_ratio
         start_index = 1 if skip_first_column else 0
 
+        clips: list[tuple[int, fitz.Rect]] = []
         for i in range(start_index, columns):
             x0 = left_offset + (i * col_width)
             x1 = left_offset + ((i + 1) * col_width)
@@ -163,21 +160,78 @@ def extract_care_labels(
             x1 = max(0.0, min(page_width, x1))
             if x1 <= x0:
                 continue
-            clip_rect = fitz.Rect(x0, top_y, x1, bottom_y)
-
-            pix = page.get_pixmap(matrix=mat, clip=clip_rect)
-            mode = "RGBA" if pix.alpha else "RGB"
-            img = Image.frombytes(mode, [pix.width, pix.height], pix.samples)
+            clips.append((i, fitz.Rect(x0, top_y, x1, bottom_y)))
 
-            label_text = page.get_text("text", clip=clip_rect) or ""
-            ocr_text = ocr_image(img) if len(label_text.strip()) < 20 else ""
-            combined_text = "\n".join(part for part in [label_text, ocr_text] if part.strip())
-
-            label_info = extract_care_label_info(combined_text)
+        for i, label_text, _ in read_columns(
+            page, clips, matrix, cache_dir, pdf_digest, text_is_complete=_has_upc_and_size
+        ):
+            label_info = extract_care_label_info(label_text)
             label_info["page"] = page_num + 1
             label_info["position"] = i
             labels.append(label_info)
+    return labels
+
 
+def iter_care_labels(
+    pdf_path: str,
+    columns: int = 8,
+    skip_first_column: bool = True,
+    zoom: float = 3.0,
+    column_width: float = 88.0,
+    left_offset: float = 45.0,
+    top_ratio: float = 0.22,
+    bottom_ratio: float = 0.61,
+    max_workers: int | None = None,
+    cache_dir: str | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Yield care label metadata one label at a time, in page order."""
+    doc = fitz.open(pdf_path)
+    page_count = doc.page_count
     doc.close()
-    parent_info = extract_parent_info(pdf_path)
-    return {"parent_info": parent_info, "care_labels": labels}
+
+    extract_page = partial(
+        _extract_page_labels,
+        pdf_path,
+        columns=columns,
+        skip_first_column=skip_first_column,
+        matrix=fitz.Matrix(zoom, zoom),
+        column_width=column_width,
+        left_offset=left_offset,
+        top_ratio=top_ratio,
+        bottom_ratio=bottom_ratio,
+        cache_dir=cache_dir,
+        pdf_digest=file_digest(pdf_path) if cache_dir else "",
+    )
+    for page_labels in iter_pages(extract_page, page_count, max_workers, pdf_path):
+        yield from page_labels
+
+
+def extract_care_labels(
+    pdf_path: str,
+    columns: int = 8,
+    skip_first_column: bool = True,
+    zoom: float = 3.0,
+    column_width: float = 88.0,
+    left_offset: float = 45.0,
+    top_ratio: float = 0.22,
+    bottom_ratio: float = 0.61,
+    max_workers: int | None = None,
+    cache_dir: str | None = None,
+    page_text: str | None = None,
+) -> dict[str, Any]:
+    care_labels = list(
+        iter_care_labels(
+            pdf_path,
+            columns=columns,
+            skip_first_column=skip_first_column,
+            zoom=zoom,
+            column_width=column_width,
+            left_offset=left_offset,
+            top_ratio=top_ratio,
+            bottom_ratio=bottom_ratio,
+            max_workers=max_workers,
+            cache_dir=cache_dir,
+        )
+    )
+    parent_info = extract_parent_info(pdf_path, page_text)
+    return {"parent_info": parent_info, "care_labels": care_labels}
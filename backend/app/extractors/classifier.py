@@ -1,52 +1,80 @@
 import re
-from typing import Any
+from typing import Any, Callable
 
-import fitz  # PyMuPDF
+from .common import first_page_text, normalize_text
 
-from .common import normalize_text, ocr_image, render_page_image
+_CARE_PATTERNS = [
+    r"\bRN#?\b",
+    r"\bMade In\b",
+    r"\bHecho En\b",
+    r"Exclusive of Decoration",
+    r"Body & Pocket",
+    r"Inner Layer",
+]
+_RFID_PATTERNS = [
+    r"WALMART\.COM/AVIA",
+    r"Find more at Walmart\.com",
+    r"REGISTERED TRADEMARK",
+    r"AVIA STRETCH",
+    r"\bBLACK\s+SOOT\b",
+    r"\bSALSA\s+DELIGHT\b",
+]
 
 
-def classify_pdf(pdf_path: str) -> dict[str, Any]:
-    """Classify a PDF as care label or RFID hang tag."""
-    doc = fitz.open(pdf_path)
-    page = doc[0]
-    text = page.get_text() or ""
-    if len(text.strip()) < 20:
-        text = f"{text}\n{ocr_image(render_page_image(page))}"
-    doc.close()
+_SIGNALS = [("care_label", pattern) for pattern in _CARE_PATTERNS] + [
+    ("rfid", pattern) for pattern in _RFID_PATTERNS
+]
 
+
+def _matcher(pattern: str) -> Callable[[str, str], bool]:
+    # Plain keywords (at most an escaped dot) are checked with a substring
+    # test on the upper-cased text, which is far cheaper than a regex search;
+    # only patterns that need \b or \s go through the regex engine.
+    keyword = pattern.replace("\\.", ".")
+    if "\\" not in keyword:
+        keyword = keyword.upper()
+        return lambda text, upper: keyword in upper
+    compiled = re.compile(pattern, re.ASCII | re.IGNORECASE)
+    return lambda text, upper: compiled.search(text) is not None
+
+
+_MATCHERS = [_matcher(pattern) for _, pattern in _SIGNALS]
+
+
+def _collect_evidence(text: str) -> dict[str, list[str]]:
+    """Check every signal against ``text``, stopping when the winner is settled.
+
+    Care labels win ties, so checking stops as soon as the care score cannot
+    be overtaken by the RFID signals still unchecked, or the RFID score
+    already beats every possible care score. Scores are therefore lower
+    bounds once decided.
+    """
+    upper = text.upper()
+    evidence: dict[str, list[str]] = {"care_label": [], "rfid": []}
+    remaining = {"care_label": len(_CARE_PATTERNS), "rfid": len(_RFID_PATTERNS)}
+    for (category, pattern), matches in zip(_SIGNALS, _MATCHERS):
+        remaining[category] -= 1
+        if matches(text, upper):
+            evidence[category].append(pattern)
+        care_score = len(evidence["care_label"])
+        rfid_score = len(evidence["rfid"])
+        if care_score >= rfid_score + remaining["rfid"] or rfid_score > care_score + remaining["care_label"]:
+            break
+    return evidence
+
+
+def classify_pdf(pdf_path: str, page_text: str | None = None) -> dict[str, Any]:
+    """Classify a PDF as care label or RFID hang tag.
+
+    ``page_text`` is the :func:`first_page_text` of ``pdf_path`` when the
+    caller has already read it.
+    """
+    text = first_page_text(pdf_path) if page_text is None else page_text
     normalized = normalize_text(text)
 
-    care_patterns = [
-        r"\bRN#?\b",
-        r"\bMade In\b",
-        r"\bHecho En\b",
-        r"Exclusive of Decoration",
-        r"Body & Pocket",
-        r"Inner Layer",
-    ]
-    rfid_patterns = [
-        r"WALMART\.COM/AVIA",
-        r"Find more at Walmart\.com",
-        r"REGISTERED TRADEMARK",
-        r"AVIA STRETCH",
-        r"\bBLACK\s+SOOT\b",
-        r"\bSALSA\s+DELIGHT\b",
-    ]
-
-    evidence = {"care_label": [], "rfid": []}
-    care_score = 0
-    rfid_score = 0
-
-    for pattern in care_patterns:
-        if re.search(pattern, normalized, re.IGNORECASE):
-            evidence["care_label"].append(pattern)
-            care_score += 1
-
-    for pattern in rfid_patterns:
-        if re.search(pattern, normalized, re.IGNORECASE):
-            evidence["rfid"].append(pattern)
-            rfid_score += 1
+    evidence = _collect_evidence(normalized)
+    care_score = len(evidence["care_label"])
+    rfid_score = len(evidence["rfid"])
 
     if care_score == 0 and rfid_score == 0:
         label = "unknown"
@@ -1,12 +1,20 @@
+import bisect
+import hashlib
+import logging
+import operator
 import os
 import re
 import shutil
+import struct
 import subprocess
 import tempfile
-from typing import Iterable
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator, TypeVar
 
 import fitz  # PyMuPDF
-from PIL import Image, ImageOps
+from PIL import Image
 
 try:
     import pytesseract
@@ -14,16 +22,173 @@ except Exception as exc:  # pragma: no cover - optional dependency
     print(f"pytesseract not found: {exc}")
     pytesseract = None
 
+try:
+    import tesserocr
+except Exception:  # pragma: no cover - optional dependency
+    tesserocr = None
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Non-printables and whitespace both end up as a single space, so one run
+# of anything outside visible ASCII is collapsed in a single pass.
+_BLANK_RUN_RE = re.compile(r"[^\x21-\x7E]+")
+_WS_RE = re.compile(r"\s+", re.ASCII)
+_DIGIT_JOIN_RE = re.compile(r"(\d) (\d)", re.ASCII)
+_HEADER_FIELD_RES = tuple(
+    (field, re.compile(rf"{label}:\s*([^\n]+)"))
+    for field, label in (
+        ("reference", "Reference #"),
+        ("job_number", "Job #"),
+        ("style_number", "Style #"),
+        ("po_number", "PO #"),
+        ("date", "Date"),
+    )
+)
+_UPC_RE = re.compile(r"(?:EAN\/?UPC|EAN|UPC)?\s*([0-9][0-9\s]{10,15})", re.ASCII | re.IGNORECASE)
+
+_OCR_STRIP_GAP = 32
+_OCR_CACHE_SIZE = 512
+_MIN_TEXT_CHARS = 20
+
+_UPC_WEIGHTS = (3, 1) * 5 + (3,)
+_EAN_WEIGHTS = (1, 3) * 6
+_UPC_ASCII_OFFSET = ord("0") * sum(_UPC_WEIGHTS)
+_EAN_ASCII_OFFSET = ord("0") * sum(_EAN_WEIGHTS)
+
+
+def _open_tess_api():
+    if tesserocr is None:
+        return None
+    try:
+        return tesserocr.PyTessBaseAPI(psm=tesserocr.PSM.SINGLE_BLOCK)
+    except RuntimeError as exc:  # pragma: no cover - missing tessdata
+        logger.warning("tesserocr unavailable: %s", exc)
+        return None
+
+
+# One Tesseract engine per process keeps the language model loaded between
+# calls. It is opened on first use so processes that never OCR (the API
+# server, text-only PDFs) skip the model load; the API object is not
+# thread-safe, so opening it and every call on it are serialized.
+_TESS_API = None
+_TESS_API_OPENED = False
+_TESS_LOCK = threading.Lock()
+
+
+def _tess_api():
+    global _TESS_API, _TESS_API_OPENED
+    if not _TESS_API_OPENED and tesserocr is not None:
+        with _TESS_LOCK:
+            if not _TESS_API_OPENED:
+                _TESS_API = _open_tess_api()
+                _TESS_API_OPENED = True
+    return _TESS_API
+
+
+# Label sheets repeat the same stencil across columns and pages, so OCR
+# output is memoized by a digest of the crop's pixels (FIFO-evicted).
+_OCR_CACHE: dict[bytes, str] = {}
+_OCR_CACHE_LOCK = threading.Lock()
+
 
 def normalize_text(text: str) -> str:
-    text = re.sub(r"[^\x20-\x7E]", " ", text)
-    text = re.sub(r"\s+", " ", text)
-    text = re.sub(r"(\d)\s+(\d)", r"\1\2", text)
+    text = _BLANK_RUN_RE.sub(" ", text)
+    text = _DIGIT_JOIN_RE.sub(r"\1\2", text)
     return text.strip()
 
 
+def extract_header_fields(text: str) -> dict[str, str]:
+    """Read the ``Label: value`` job-sheet header lines shared by both PDF types."""
+    fields: dict[str, str] = {}
+    for field, pattern in _HEADER_FIELD_RES:
+        match = pattern.search(text)
+        if match:
+            fields[field] = match.group(1).strip()
+    return fields
+
+
+def _otsu_threshold(histogram: list[int]) -> int:
+    total = sum(histogram)
+    weighted_total = sum(level * count for level, count in enumerate(histogram))
+    background = weighted_background = 0
+    best_level, best_variance = 0, 0.0
+    for level, count in enumerate(histogram):
+        background += count
+        if not background:
+            continue
+        foreground = total - background
+        if not foreground:
+            break
+        weighted_background += level * count
+        mean_background = weighted_background / background
+        mean_foreground = (weighted_total - weighted_background) / foreground
+        variance = background * foreground * (mean_background - mean_foreground) ** 2
+        if variance > best_variance:
+            best_level, best_variance = level, variance
+    return best_level
+
+
+def _prepare_for_ocr(image: Image.Image) -> Image.Image:
+    # Binarize with Otsu so Tesseract can skip its own thresholding pass;
+    # the 256-bin histogram and the lookup-table point() both run in C.
+    gray = image if image.mode == "L" else image.convert("L")
+    threshold = _otsu_threshold(gray.histogram())
+    return gray.point([0] * (threshold + 1) + [255] * (255 - threshold))
+
+
+def page_needs_ocr(page: fitz.Page, text: str) -> bool:
+    """Whether ``page`` must be OCR'd to supplement its embedded ``text``.
+
+    Pages with enough embedded text are skipped, and so are pages with no
+    images and an empty content stream: rendering those only hands
+    Tesseract a white bitmap.
+    """
+    if len(text.strip()) >= _MIN_TEXT_CHARS:
+        return False
+    return bool(page.get_images()) or bool(page.read_contents().strip())
+
+
+def crop_needs_ocr(image: Image.Image, text: str) -> bool:
+    """Column-crop counterpart of :func:`page_needs_ocr`; blank crops are skipped."""
+    if len(text.strip()) >= _MIN_TEXT_CHARS:
+        return False
+    low, high = image.getextrema()
+    return low != high
+
+
+def _ocr_key(image: Image.Image) -> bytes:
+    digest = hashlib.blake2b(f"{image.mode}{image.size}".encode("ascii"), digest_size=16)
+    digest.update(image.tobytes())
+    return digest.digest()
+
+
+def _remember_ocr(key: bytes, text: str) -> None:
+    with _OCR_CACHE_LOCK:
+        if key not in _OCR_CACHE and len(_OCR_CACHE) >= _OCR_CACHE_SIZE:
+            del _OCR_CACHE[next(iter(_OCR_CACHE))]
+        _OCR_CACHE[key] = text
+
+
 def ocr_image(image: Image.Image) -> str:
-    gray = ImageOps.autocontrast(image.convert("L"))
+    key = _ocr_key(image)
+    text = _OCR_CACHE.get(key)
+    if text is None:
+        text = _run_ocr(image)
+        _remember_ocr(key, text)
+    return text
+
+
+def _run_ocr(image: Image.Image) -> str:
+    gray = _prepare_for_ocr(image)
+    api = _tess_api()
+    if api is not None:
+        # Hand over the raw 8-bit raster; SetImage would first re-encode
+        # the PIL image so Leptonica can decode it again.
+        with _TESS_LOCK:
+            api.SetImageBytes(gray.tobytes(), gray.width, gray.height, 1, gray.width)
+            return api.GetUTF8Text()
     if pytesseract is not None:
         return pytesseract.image_to_string(gray, config="--psm 6")
     tesseract_bin = shutil.which("tesseract")
@@ -32,7 +197,7 @@ def ocr_image(image: Image.Image) -> str:
     with tempfile.TemporaryDirectory() as tmpdir:
         input_path = os.path.join(tmpdir, "ocr_input.png")
         output_base = os.path.join(tmpdir, "ocr_output")
-        gray.save(input_path, "PNG")
+        gray.save(input_path, "PNG", compress_level=1)
         try:
             subprocess.run(
                 [tesseract_bin, input_path, output_base, "--psm", "6"],
@@ -50,44 +215,336 @@ def ocr_image(image: Image.Image) -> str:
             return ""
 
 
+def ocr_images(images: list[Image.Image]) -> list[str]:
+    """OCR several crops, reusing cached results for crops seen before.
+
+    Only distinct, uncached crops reach Tesseract, in a single batch.
+    """
+    keys = [_ocr_key(image) for image in images]
+    results = [_OCR_CACHE.get(key) for key in keys]
+    missing: dict[bytes, int] = {}
+    for index, (key, text) in enumerate(zip(keys, results)):
+        if text is None:
+            missing.setdefault(key, index)
+    if missing:
+        texts = _run_ocr_batch([images[index] for index in missing.values()])
+        fresh = dict(zip(missing, texts))
+        for key, text in fresh.items():
+            _remember_ocr(key, text)
+        results = [fresh[key] if text is None else text for key, text in zip(keys, results)]
+    return results
+
+
+def _run_ocr_batch(images: list[Image.Image]) -> list[str]:
+    """OCR several crops with a single Tesseract call.
+
+    The crops are stacked into one tall strip separated by blank bands and
+    every recognized word is attributed back to the crop it falls in, so the
+    per-invocation Tesseract startup cost is paid once per batch. With a
+    persistent tesserocr engine there is no startup cost to amortize.
+    """
+    if _tess_api() is not None or pytesseract is None or len(images) < 2:
+        return [_run_ocr(image) for image in images]
+
+    grays = [_prepare_for_ocr(image) for image in images]
+    width = max(gray.width for gray in grays)
+    height = sum(gray.height for gray in grays) + _OCR_STRIP_GAP * (len(grays) - 1)
+    strip = Image.new("L", (width, height), 255)
+    bottoms: list[int] = []
+    top = 0
+    for gray in grays:
+        strip.paste(gray, (0, top))
+        top += gray.height
+        bottoms.append(top)
+        top += _OCR_STRIP_GAP
+
+    data = pytesseract.image_to_data(strip, config="--psm 6", output_type=pytesseract.Output.DICT)
+    lines: list[dict[tuple[int, int, int], list[str]]] = [{} for _ in images]
+    for word, word_top, word_height, block, par, line in zip(
+        data["text"], data["top"], data["height"], data["block_num"], data["par_num"], data["line_num"]
+    ):
+        if not word.strip():
+            continue
+        index = min(bisect.bisect_left(bottoms, word_top + word_height // 2), len(images) - 1)
+        lines[index].setdefault((block, par, line), []).append(word)
+    return ["\n".join(" ".join(words) for words in crop_lines.values()) for crop_lines in lines]
+
+
+def _pixmap_image(pix: fitz.Pixmap) -> Image.Image:
+    # ``pix.samples`` is already a private bytes copy, so let PIL wrap it
+    # rather than copying the whole raster a second time.
+    return Image.frombuffer("L", (pix.width, pix.height), pix.samples, "raw", "L", pix.stride, 1)
+
+
+def first_page_text(pdf_path: str) -> str:
+    """Embedded text of the first page, with OCR output appended when needed.
+
+    Classification and both parent-info readers work from this text, so
+    callers handling one upload can read it once and pass it along.
+    """
+    doc = fitz.open(pdf_path)
+    page = doc[0]
+    text = page.get_text() or ""
+    if page_needs_ocr(page, text):
+        text = f"{text}\n{ocr_image(render_page_image(page))}"
+    doc.close()
+    return text
+
+
 def render_page_image(page: fitz.Page, zoom: float = 2.0) -> Image.Image:
-    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
-    mode = "RGBA" if pix.alpha else "RGB"
-    return Image.frombytes(mode, [pix.width, pix.height], pix.samples)
+    # Everything downstream (OCR, zbar) works on grayscale, so let MuPDF
+    # emit one channel instead of converting RGB afterwards.
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY, alpha=False)
+    return _pixmap_image(pix)
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _render_strip(
+    page: fitz.Page,
+    strip: fitz.Rect,
+    matrix: fitz.Matrix,
+    cache_dir: str | None,
+    pdf_digest: str,
+) -> Image.Image:
+    cache_path = ""
+    if cache_dir and pdf_digest:
+        key = hashlib.blake2b(
+            pdf_digest.encode("ascii") + struct.pack("<i10f", page.number, *matrix, *strip),
+            digest_size=16,
+        ).hexdigest()
+        cache_path = os.path.join(cache_dir, f"{key}.png")
+        if os.path.exists(cache_path):
+            with Image.open(cache_path) as cached:
+                cached.load()
+                return cached
+
+    pix = page.get_pixmap(matrix=matrix, clip=strip, colorspace=fitz.csGRAY, alpha=False)
+    image = _pixmap_image(pix)
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write then rename so concurrent workers never read a partial file.
+        with tempfile.NamedTemporaryFile(dir=cache_dir, suffix=".png", delete=False) as tmp:
+            tmp.write(pix.tobytes("png"))
+        os.replace(tmp.name, cache_path)
+    return image
+
+
+def render_columns(
+    page: fitz.Page,
+    rects: list[fitz.Rect],
+    matrix: fitz.Matrix,
+    cache_dir: str | None = None,
+    pdf_digest: str = "",
+) -> list[Image.Image]:
+    """Rasterize the strip covering ``rects`` once and crop each rect out of it.
+
+    When ``cache_dir`` and the PDF's ``file_digest`` are given, the rendered
+    strip is kept on disk so re-processing the same file skips MuPDF.
+    """
+    strip = fitz.Rect(rects[0])
+    for rect in rects[1:]:
+        strip |= rect
+    image = _render_strip(page, strip, matrix, cache_dir, pdf_digest)
+    origin = (strip * matrix).irect
+    crops: list[Image.Image] = []
+    for rect in rects:
+        box = (rect * matrix).irect
+        crops.append(image.crop((box.x0 - origin.x0, box.y0 - origin.y0, box.x1 - origin.x0, box.y1 - origin.y0)))
+    return crops
+
+
+def clip_texts(page: fitz.Page, rects: list[fitz.Rect]) -> list[str]:
+    """Return ``page.get_text("text", clip=rect)`` for every rect in one pass.
+
+    The page is extracted once and each line is split across the rects it
+    overlaps. MuPDF decides clip membership on a glyph's outline, which
+    ``rawdict`` does not expose, so characters are only assigned when their
+    box lies wholly inside or outside a rect; a rect that a character
+    straddles is extracted again with ``clip`` instead.
+    """
+    bounds = [tuple(rect) for rect in rects]
+    parts: list[list[str]] = [[] for _ in rects]
+    straddled: set[int] = set()
+    for block in page.get_text("rawdict")["blocks"]:
+        for line in block.get("lines", ()):
+            lx0, ly0, lx1, ly1 = line["bbox"]
+            targets = [
+                index
+                for index, (x0, y0, x1, y1) in enumerate(bounds)
+                if index not in straddled and lx0 < x1 and lx1 > x0 and ly0 < y1 and ly1 > y0
+            ]
+            if not targets:
+                continue
+            chars = [(char["c"], char["bbox"]) for span in line["spans"] for char in span["chars"]]
+            for index in targets:
+                x0, y0, x1, y1 = bounds[index]
+                kept: list[str] = []
+                for c, (cx0, cy0, cx1, cy1) in chars:
+                    if x0 <= cx0 and cx1 <= x1 and y0 <= cy0 and cy1 <= y1:
+                        kept.append(c)
+                    elif cx0 < x1 and cx1 > x0 and cy0 < y1 and cy1 > y0:
+                        straddled.add(index)
+                        break
+                else:
+                    if kept:
+                        parts[index].append("".join(kept) + "\n")
+    texts = ["".join(lines) for lines in parts]
+    for index in straddled:
+        texts[index] = page.get_text("text", clip=rects[index])
+    return texts
+
+
+def read_columns(
+    page: fitz.Page,
+    clips: list[tuple[int, fitz.Rect]],
+    matrix: fitz.Matrix,
+    cache_dir: str | None = None,
+    pdf_digest: str = "",
+    text_is_complete: Callable[[str], bool] | None = None,
+) -> list[tuple[int, str, Image.Image]]:
+    """Render, extract and, where needed, OCR every column clip on ``page``.
+
+    ``clips`` pairs each column position with its rect. Returns one
+    ``(position, text, image)`` per clip, where ``text`` joins the embedded
+    text with any OCR output. This is the shared per-page pipeline behind
+    the care-label and hang-tag extractors.
+
+    ``text_is_complete`` lets the caller skip OCR for short embedded text
+    that already carries every field it needs.
+    """
+    if not clips:
+        return []
+    rects = [rect for _, rect in clips]
+    images = render_columns(page, rects, matrix, cache_dir, pdf_digest)
+    texts = clip_texts(page, rects)
+    pending = [
+        index
+        for index, text in enumerate(texts)
+        if crop_needs_ocr(images[index], text) and not (text_is_complete and text_is_complete(text))
+    ]
+    ocr_texts = dict(zip(pending, ocr_images([images[index] for index in pending])))
+
+    columns: list[tuple[int, str, Image.Image]] = []
+    for index, ((position, _), image) in enumerate(zip(clips, images)):
+        parts = [texts[index], ocr_texts.get(index, "")]
+        columns.append((position, "\n".join(part for part in parts if part.strip()), image))
+    return columns
+
+
+# Page workers are Tesseract-bound and each loads its own language data, so
+# more than a handful mostly adds memory pressure rather than throughput.
+_DEFAULT_PAGE_WORKERS = min(os.cpu_count() or 1, 4)
+
+
+# Documents held open for the duration of an iter_pages run, keyed by path:
+# one per pool worker process, or one in the caller when running serially.
+_OPEN_DOCUMENTS: dict[str, fitz.Document] = {}
+
+
+def _hold_document(pdf_path: str) -> None:
+    _OPEN_DOCUMENTS[pdf_path] = fitz.open(pdf_path)
+
+
+@contextmanager
+def page_document(pdf_path: str) -> Iterator[fitz.Document]:
+    """Open ``pdf_path`` for a page worker, reusing the copy iter_pages holds."""
+    doc = _OPEN_DOCUMENTS.get(pdf_path)
+    if doc is not None:
+        yield doc
+        return
+    doc = fitz.open(pdf_path)
+    try:
+        yield doc
+    finally:
+        doc.close()
+
+
+def iter_pages(
+    func: Callable[[int], T],
+    page_count: int,
+    max_workers: int | None = None,
+    pdf_path: str | None = None,
+) -> Iterator[T]:
+    """Yield ``func(page_num)`` for every page, in order, using worker processes.
+
+    Workers receive only the page index, so ``func`` must reopen the PDF
+    itself; ``fitz.Document`` objects cannot be shared across processes.
+    When ``pdf_path`` is given, each worker opens it once up front and
+    ``func`` picks that copy up through :func:`page_document`.
+    """
+    workers = min(max_workers or _DEFAULT_PAGE_WORKERS, page_count)
+    if workers <= 1:
+        hold = pdf_path is not None and pdf_path not in _OPEN_DOCUMENTS
+        if hold:
+            _hold_document(pdf_path)
+        try:
+            for page_num in range(page_count):
+                yield func(page_num)
+        finally:
+            if hold:
+                _OPEN_DOCUMENTS.pop(pdf_path).close()
+        return
+    initializer = _hold_document if pdf_path is not None else None
+    initargs = (pdf_path,) if pdf_path is not None else ()
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs)
+    try:
+        yield from executor.map(func, range(page_count))
+    finally:
+        # A consumer that stops early should not wait for pages it will
+        # never read; only the ones already running are finished.
+        executor.shutdown(cancel_futures=True)
 
 
 def is_valid_upc_ean(code: str) -> bool:
-    if not code.isdigit():
-        return False
-    digits = list(map(int, code))
-    check = digits.pop()
     if len(code) == 12:  # UPC-A
-        total = sum(digits[i] * 3 if i % 2 == 0 else digits[i] for i in range(11))
+        weights, offset = _UPC_WEIGHTS, _UPC_ASCII_OFFSET
     elif len(code) == 13:  # EAN-13
-        total = sum(digits[i] * 3 if i % 2 == 1 else digits[i] for i in range(12))
+        weights, offset = _EAN_WEIGHTS, _EAN_ASCII_OFFSET
     else:
         return False
-    return (10 - (total % 10)) % 10 == check
+    if not (code.isascii() and code.isdigit()):
+        return False
+    # Weight the raw ASCII bytes and subtract the '0' bias in one step
+    # instead of converting every digit to int first.
+    digits = code.encode("ascii")
+    total = sum(map(operator.mul, digits, weights)) - offset
+    return (10 - (total % 10)) % 10 == digits[-1] - 48
 
 
 def extract_upc_candidate(text: str) -> str:
     normalized = normalize_text(text)
-    match = re.search(r"(?:EAN\/?UPC|EAN|UPC)?\s*([0-9][0-9\s]{10,15})", normalized, re.IGNORECASE)
+    match = _UPC_RE.search(normalized)
     if not match:
         return ""
-    digits = re.sub(r"\s+", "", match.group(1))
+    digits = _WS_RE.sub("", match.group(1))
     if len(digits) > 12:
         digits = digits.lstrip("0")
     return digits if len(digits) in (12, 13) else ""
 
 
-def extract_valid_upc(text: str) -> str:
+def find_upc(text: str) -> tuple[str, str]:
+    """Return ``(valid_upc, candidate)`` from a single candidate scan.
+
+    ``valid_upc`` is only set when the candidate passes the UPC/EAN check
+    digit; the raw candidate is returned either way. Callers pass text they
+    have already normalized: the second normalization is what joins
+    single-spaced digits, which one pass only pairs up ("1 9 8 8" -> "19 88").
+    """
     candidate = extract_upc_candidate(text)
-    if not candidate:
-        return ""
-    if len(candidate) > 12:
-        candidate = candidate.lstrip("0")
-    return candidate if is_valid_upc_ean(candidate) else ""
+    if candidate and is_valid_upc_ean(candidate):
+        return candidate, candidate
+    return "", candidate
+
+
+def extract_valid_upc(text: str) -> str:
+    return find_upc(text)[0]
 
 
 def first_match(values: Iterable[str]) -> str:
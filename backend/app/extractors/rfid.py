@@ -3,7 +3,8 @@ import re
 import shutil
 import subprocess
 import tempfile
-from typing import Any
+from functools import partial
+from typing import Any, Iterator
 
 import fitz  # PyMuPDF
 from PIL import Image
@@ -14,15 +15,25 @@ except Exception:  # pragma: no cover - optional dependency
     zbar_decode = None
 
 from .common import (
-    extract_upc_candidate,
-    extract_valid_upc,
+    extract_header_fields,
+    file_digest,
+    find_upc,
+    first_page_text,
+    iter_pages,
     normalize_text,
-    ocr_image,
-    render_page_image,
+    page_document,
+    read_columns,
 )
 
 logger = logging.getLogger(__name__)
 
+_SIZE_RE = re.compile(r"\b(XXXL|XXL|XL|L|M|S|XS)\b\s*\(([^)]+)\)", re.ASCII)
+_COLOR_RE = re.compile(r"(BLACK\s+SOOT|SALSA\s+DELIGHT)", re.ASCII | re.IGNORECASE)
+_COLOR_CODE_RE = re.compile(r"(BLACK\s+SOOT|SALSA\s+DELIGHT)\s+(\d+)", re.ASCII | re.IGNORECASE)
+_PARENT_COLOR_RE = re.compile(r"\b(BLACK\s+SOOT|SALSA\s+DELIGHT)\b", re.ASCII | re.IGNORECASE)
+_STYLE_RE = re.compile(r"(AV\d+[A-Z]+\d+)", re.ASCII)
+_RN_RE = re.compile(r"RN#\s*(\d+)", re.ASCII)
+
 
 def _decode_barcodes(image: Image.Image) -> list[str]:
     if zbar_decode is None:
@@ -49,7 +60,7 @@ def _decode_barcodes(image: Image.Image) -> list[str]:
 
     with tempfile.TemporaryDirectory() as tmpdir:
         image_path = f"{tmpdir}/barcode.png"
-        image.save(image_path, "PNG")
+        image.save(image_path, "PNG", compress_level=1)
         try:
             result = subprocess.run(
                 [zbarimg, "--raw", image_path],
@@ -77,47 +88,29 @@ def _decode_barcodes(image: Image.Image) -> list[str]:
     return values
 
 
-def extract_parent_info(pdf_path: str) -> dict[str, Any]:
-    doc = fitz.open(pdf_path)
-    page = doc[0]
-    text = page.get_text() or ""
-    if len(text.strip()) < 20:
-        text = f"{text}\n{ocr_image(render_page_image(page))}"
+def _has_upc_and_size(text: str) -> bool:
+    normalized = normalize_text(text)
+    return bool(find_upc(normalized)[0] and _SIZE_RE.search(normalized))
+
+
+def extract_parent_info(pdf_path: str, page_text: str | None = None) -> dict[str, Any]:
+    text = first_page_text(pdf_path) if page_text is None else page_text
     parent_info: dict[str, Any] = {}
 
     if "STRETCH WOVEN DRESS" in text:
         parent_info["product_name"] = "Stretch Woven Dress"
 
-    ref_match = re.search(r"Reference #:\s*([^\n]+)", text)
-    if ref_match:
-        parent_info["reference"] = ref_match.group(1).strip()
-
-    job_match = re.search(r"Job #:\s*([^\n]+)", text)
-    if job_match:
-        parent_info["job_number"] = job_match.group(1).strip()
-
-    style_match = re.search(r"Style #:\s*([^\n]+)", text)
-    if style_match:
-        parent_info["style_number"] = style_match.group(1).strip()
-
-    po_match = re.search(r"PO #:\s*([^\n]+)", text)
-    if po_match:
-        parent_info["po_number"] = po_match.group(1).strip()
-
-    date_match = re.search(r"Date:\s*([^\n]+)", text)
-    if date_match:
-        parent_info["date"] = date_match.group(1).strip()
+    parent_info.update(extract_header_fields(text))
 
     if "r-pac International Corporation" in text:
         parent_info["manufacturer"] = "r-pac International Corporation"
         parent_info["manufacturer_location"] = "Taiwan"
 
     normalized = normalize_text(text)
-    color_match = re.search(r"\b(BLACK\s+SOOT|SALSA\s+DELIGHT)\b", normalized, re.IGNORECASE)
+    color_match = _PARENT_COLOR_RE.search(normalized)
     if color_match:
         parent_info["color"] = color_match.group(1).upper().replace("  ", " ")
 
-    doc.close()
     return parent_info
 
 
@@ -125,84 +118,133 @@ def extract_tag_info(text: str, tag_image: Image.Image | None = None) -> dict[st
     info: dict[str, Any] = {}
     normalized = normalize_text(text)
 
-    size_match = re.search(r"\b(XXXL|XXL|XL|L|M|S|XS)\b\s*\(([^)]+)\)", normalized)
+    size_match = _SIZE_RE.search(normalized)
     if size_match:
         info["size"] = size_match.group(1)
         info["size_range"] = size_match.group(2)
 
-    upc = extract_valid_upc(normalized)
+    upc, candidate = find_upc(normalized)
     if upc:
         info["upc"] = upc
-    else:
-        candidate = extract_upc_candidate(normalized)
-        if candidate:
-            info["upc_candidate"] = candidate
+    elif candidate:
+        info["upc_candidate"] = candidate
 
     if tag_image is not None:
         barcodes = _decode_barcodes(tag_image)
         if barcodes:
             info["barcode"] = barcodes[0]
 
-    color_match = re.search(r"(BLACK\s+SOOT|SALSA\s+DELIGHT)", normalized, re.IGNORECASE)
+    color_match = _COLOR_RE.search(normalized)
     if color_match:
         info["color"] = color_match.group(1).upper().replace("  ", " ")
 
-    color_code_match = re.search(r"(BLACK\s+SOOT|SALSA\s+DELIGHT)\s+(\d+)", normalized, re.IGNORECASE)
+    color_code_match = _COLOR_CODE_RE.search(normalized)
     if color_code_match:
         info["color_code"] = color_code_match.group(2)
 
-    style_match = re.search(r"(AV\d+[A-Z]+\d+)", normalized)
+    style_match = _STYLE_RE.search(normalized)
     if style_match:
         info["style_number"] = style_match.group(1)
 
-    rn_match = re.search(r"RN#\s*(\d+)", normalized)
+    rn_match = _RN_RE.search(normalized)
     if rn_match:
         info["rn_number"] = rn_match.group(1)
 
     return info
 
 
-def extract_hang_tags(
+def _extract_page_tags(
     pdf_path: str,
-    columns: int = 8,
-    skip_first_column: bool = True,
-    top_ratio: float = 0.22,
-    bottom_ratio: float = 0.92,
-    zoom: float = 3.0,
-) -> dict[str, Any]:
-    doc = fitz.open(pdf_path)
-    hang_tags: list[dict[str, Any]] = []
+    page_num: int,
+    columns: int,
+    skip_first_column: bool,
+    top_ratio: float,
+    bottom_ratio: float,
+    matrix: fitz.Matrix,
+    cache_dir: str | None,
+    pdf_digest: str,
+) -> list[dict[str, Any]]:
+    with page_document(pdf_path) as doc:
+        page = doc[page_num]
+        hang_tags: list[dict[str, Any]] = []
 
-    for page_num, page in enumerate(doc):
         page_rect = page.rect
         page_width = page_rect.width
         page_height = page_rect.height
 
-        mat = fitz.Matrix(zoom, zoom)
         column_width = page_width / columns
         start_index = 1 if skip_first_column else 0
 
         top_y = page_height * top_ratio
         bottom_y = page_height * bottom_ratio
 
-        for i in range(start_index, columns):
-            x0 = i * column_width
-            x1 = (i + 1) * column_width
-            clip_rect = fitz.Rect(x0, top_y, x1, bottom_y)
-
-            pix = page.get_pixmap(matrix=mat, clip=clip_rect)
-            mode = "RGBA" if pix.alpha else "RGB"
-            tag_img = Image.frombytes(mode, [pix.width, pix.height], pix.samples)
-
-            tag_text = page.get_text("text", clip=clip_rect) or ""
-            ocr_text = ocr_image(tag_img) if len(tag_text.strip()) < 20 else ""
-            combined_text = "\n".join(part for part in [tag_text, ocr_text] if part.strip())
-            tag_info = extract_tag_info(combined_text, tag_img)
+        clips = [
+            (i, fitz.Rect(i * column_width, top_y, (i + 1) * column_width, bottom_y))
+            for i in range(start_index, columns)
+        ]
 
+        for i, tag_text, tag_img in read_columns(
+            page, clips, matrix, cache_dir, pdf_digest, text_is_complete=_has_upc_and_size
+        ):
+            tag_info = extract_tag_info(tag_text, tag_img)
             tag_info["page"] = page_num + 1
             tag_info["position"] = i
             hang_tags.append(tag_info)
+    return hang_tags
+
 
+def iter_hang_tags(
+    pdf_path: str,
+    columns: int = 8,
+    skip_first_column: bool = True,
+    top_ratio: float = 0.22,
+    bottom_ratio: float = 0.92,
+    zoom: float = 3.0,
+    max_workers: int | None = None,
+    cache_dir: str | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Yield hang tag metadata one label at a time, in page order."""
+    doc = fitz.open(pdf_path)
+    page_count = doc.page_count
     doc.close()
-    parent_info = extract_parent_info(pdf_path)
+
+    extract_page = partial(
+        _extract_page_tags,
+        pdf_path,
+        columns=columns,
+        skip_first_column=skip_first_column,
+        top_ratio=top_ratio,
+        bottom_ratio=bottom_ratio,
+        matrix=fitz.Matrix(zoom, zoom),
+        cache_dir=cache_dir,
+        pdf_digest=file_digest(pdf_path) if cache_dir else "",
+    )
+    for page_tags in iter_pages(extract_page, page_count, max_workers, pdf_path):
+        yield from page_tags
+
+
+def extract_hang_tags(
+    pdf_path: str,
+    columns: int = 8,
+    skip_first_column: bool = True,
+    top_ratio: float = 0.22,
+    bottom_ratio: float = 0.92,
+    zoom: float = 3.0,
+    max_workers: int | None = None,
+    cache_dir: str | None = None,
+    page_text: str | None = None,
+) -> dict[str, Any]:
+    hang_tags = list(
+        iter_hang_tags(
+            pdf_path,
+            columns=columns,
+            skip_first_column=skip_first_column,
+            top_ratio=top_ratio,
+            bottom_ratio=bottom_ratio,
+            zoom=zoom,
+            max_workers=max_workers,
+            cache_dir=cache_dir,
+        )
+    )
+    parent_info = extract_parent_info(pdf_path, page_text)
     return {"parent_info": parent_info, "hang_tags": hang_tags}
@@ -1,15 +1,84 @@
+import asyncio
+import multiprocessing
 import os
 import tempfile
-from typing import Any
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, TypeVar
 
-from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi import FastAPI, File, HTTPException, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from app.extractors.carelabel import extract_care_labels
 from app.extractors.classifier import classify_pdf
+from app.extractors.common import first_page_text
 from app.extractors.rfid import extract_hang_tags
 
-app = FastAPI(title="UPC Validator API", version="0.1.0")
+RENDER_CACHE_DIR = os.environ.get("RENDER_CACHE_DIR") or None
+
+T = TypeVar("T")
+
+# Uploaded files are classified and extracted in separate processes so a
+# multi-file request uses several cores and never blocks the event loop.
+# Each file's pages run serially inside its worker, so one server process
+# never runs more than PDF_WORKERS extraction processes.
+PDF_WORKERS = min(os.cpu_count() or 1, 4)
+# The server already runs threads (the event loop's thread pool) by the time
+# the pool starts workers, and forking a threaded process can deadlock, so
+# workers start from a clean server process instead.
+PDF_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+def _new_pdf_pool() -> ProcessPoolExecutor:
+    context = multiprocessing.get_context(PDF_START_METHOD)
+    return ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=context)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    app.state.pdf_pool = _new_pdf_pool()
+    app.state.pdf_pool_lock = asyncio.Lock()
+    try:
+        yield
+    finally:
+        app.state.pdf_pool.shutdown()
+
+
+async def _replace_pdf_pool(app: FastAPI, broken: ProcessPoolExecutor) -> None:
+    # Requests that shared the broken pool all land here; only the first
+    # one replaces it.
+    async with app.state.pdf_pool_lock:
+        if app.state.pdf_pool is broken:
+            app.state.pdf_pool = _new_pdf_pool()
+            broken.shutdown(wait=False)
+
+
+async def _run_in_pdf_pool(app: FastAPI, func: Callable[..., T], *args: Any) -> T:
+    """Run ``func(*args)`` in the PDF pool, replacing the pool if it broke.
+
+    A worker that dies, or raises an exception that cannot be unpickled,
+    breaks the whole pool and fails every task still in it. Those requests
+    fail, but the pool is rebuilt so later requests are unaffected. Tasks
+    are not retried, since the one that broke the pool would break the new
+    one too.
+    """
+    loop = asyncio.get_running_loop()
+    pool = app.state.pdf_pool
+    try:
+        return await loop.run_in_executor(pool, func, *args)
+    except BrokenProcessPool:
+        await _replace_pdf_pool(app, pool)
+        raise
+
+
+app = FastAPI(
+    title="UPC Validator API",
+    version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -20,18 +89,22 @@ app.add_middleware(
 )
 
 
-def _save_upload(file: UploadFile) -> str:
+async def _save_upload(file: UploadFile) -> str:
     suffix = ".pdf" if file.filename and file.filename.lower().endswith(".pdf") else ""
     with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        tmp.write(file.file.read())
+        while chunk := await file.read(1 << 20):
+            await run_in_threadpool(tmp.write, chunk)
         return tmp.name
 
 
 def _normalize_items(items: list[dict[str, Any]], parent_info: dict[str, Any]) -> list[dict[str, Any]]:
     normalized = []
     for item in items:
-        raw_item = dict(item)
-        raw_item.pop("composition", None)
+        # Items are not mutated after extraction, so only copy the ones
+        # that carry a composition to drop.
+        raw_item = item
+        if "composition" in item:
+            raw_item = {key: value for key, value in item.items() if key != "composition"}
         merged = {
             "style_number": item.get("style_number") or parent_info.get("style_number"),
             "size": item.get("size"),
@@ -48,43 +121,62 @@ def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+def _extract_pdf_file(tmp_path: str) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """Classify and extract one saved upload; runs in the PDF worker pool."""
+    page_text = first_page_text(tmp_path)
+    classification = classify_pdf(tmp_path, page_text)
+    options = {"max_workers": 1, "cache_dir": RENDER_CACHE_DIR, "page_text": page_text}
+    if classification["type"] == "care_label":
+        metadata = extract_care_labels(tmp_path, **options)
+        return _normalize_items(metadata["care_labels"], metadata["parent_info"]), []
+    if classification["type"] == "rfid":
+        metadata = extract_hang_tags(tmp_path, **options)
+        return [], _normalize_items(metadata["hang_tags"], metadata["parent_info"])
+    metadata = extract_care_labels(tmp_path, **options)
+    if metadata["care_labels"]:
+        return _normalize_items(metadata["care_labels"], metadata["parent_info"]), []
+    metadata = extract_hang_tags(tmp_path, **options)
+    return [], _normalize_items(metadata["hang_tags"], metadata["parent_info"])
+
+
 @app.post("/extract")
-def extract(files: list[UploadFile] = File(...)) -> dict[str, Any]:
+async def extract(request: Request, files: list[UploadFile] = File(...)) -> dict[str, Any]:
     if not files:
         raise HTTPException(status_code=400, detail="No files provided.")
-
-    care_labels: list[dict[str, Any]] = []
-    hang_tags: list[dict[str, Any]] = []
-
     for file in files:
         if file.content_type not in {"application/pdf", "application/x-pdf"}:
             raise HTTPException(status_code=400, detail=f"Unsupported file: {file.filename}")
 
-        tmp_path = _save_upload(file)
-        try:
-            classification = classify_pdf(tmp_path)
-            if classification["type"] == "care_label":
-                metadata = extract_care_labels(tmp_path)
-                care_labels.extend(_normalize_items(metadata["care_labels"], metadata["parent_info"]))
-            elif classification["type"] == "rfid":
-                metadata = extract_hang_tags(tmp_path)
-                hang_tags.extend(_normalize_items(metadata["hang_tags"], metadata["parent_info"]))
-            else:
-                metadata = extract_care_labels(tmp_path)
-                if metadata["care_labels"]:
-                    care_labels.extend(_normalize_items(metadata["care_labels"], metadata["parent_info"]))
-                else:
-                    metadata = extract_hang_tags(tmp_path)
-                    hang_tags.extend(_normalize_items(metadata["hang_tags"], metadata["parent_info"]))
-        finally:
+    tmp_paths: list[str] = []
+
+    async def process(file: UploadFile) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+        # Each file is handed to the pool as soon as it is on disk, so
+        # extraction of earlier files overlaps with saving later ones.
+        tmp_path = await _save_upload(file)
+        tmp_paths.append(tmp_path)
+        return await _run_in_pdf_pool(request.app, _extract_pdf_file, tmp_path)
+
+    try:
+        # Let every file finish before cleaning up so a failure in one does
+        # not delete temp files another worker is still reading.
+        results = await asyncio.gather(*(process(file) for file in files), return_exceptions=True)
+    finally:
+        for tmp_path in tmp_paths:
             try:
                 os.remove(tmp_path)
             except OSError:
                 pass
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+    care_labels: list[dict[str, Any]] = []
+    hang_tags: list[dict[str, Any]] = []
+    for file_care_labels, file_hang_tags in results:
+        care_labels.extend(file_care_labels)
+        hang_tags.extend(file_hang_tags)
 
     return {
         "care_labels": care_labels,
         "hang_tags": hang_tags,
     }
-
-
@@ -1,27 +1,47 @@
 import re
+from functools import lru_cache
 from typing import Any
 
 import pandas as pd
 
+_WS_RE = re.compile(r"\s+")
+_NONDIGIT_RE = re.compile(r"\D")
+_COLNAME_RE = re.compile(r"[^a-z0-9]+")
+
 
 def _normalize_value(value: Any) -> str:
     if value is None:
         return ""
-    text = str(value).strip()
-    return re.sub(r"\s+", " ", text).upper()
+    return _normalize_text(str(value))
 
 
 def _normalize_upc(value: Any) -> str:
     if value is None:
         return ""
-    digits = re.sub(r"\D", "", str(value))
+    return _normalize_digits(str(value))
+
+
+# Catalog rows and extracted items repeat the same styles, sizes, colors and
+# UPCs, so the normalizers memoize on the stringified value; stringifying
+# first also keeps unhashable inputs out of the cache key.
+@lru_cache(maxsize=4096)
+def _normalize_text(text: str) -> str:
+    return _WS_RE.sub(" ", text.strip()).upper()
+
+
+@lru_cache(maxsize=4096)
+def _normalize_digits(digits: str) -> str:
+    # isdecimal() holds exactly when every character matches \d, so clean
+    # codes, including the plain ints openpyxl returns, skip the regex.
+    if not digits.isdecimal():
+        digits = _NONDIGIT_RE.sub("", digits)
     if len(digits) > 12:
         digits = digits.lstrip("0")
     return digits
 
 
 def _normalize_column_name(name: str) -> str:
-    return re.sub(r"[^a-z0-9]+", "", name.lower())
+    return _COLNAME_RE.sub("", name.lower())
 
 
 def _map_columns(columns: list[str]) -> dict[str, str]:
@@ -44,63 +64,109 @@ def _map_columns(columns: list[str]) -> dict[str, str]:
     }
 
 
-def read_spreadsheet(file_path: str) -> list[dict[str, Any]]:
-    df = pd.read_excel(file_path)
-    column_map = _map_columns(df.columns.tolist())
-    rows: list[dict[str, Any]] = []
+def _normalize_value_column(series: pd.Series) -> pd.Series:
+    """Column-wise :func:`_normalize_value`; empty cells become ``""``."""
+    text = series.fillna("").astype(str).str.strip()
+    return text.str.replace(_WS_RE, " ", regex=True).str.upper()
 
-    for _, row in df.iterrows():
-        style = _normalize_value(row.get(column_map["style"])) if column_map["style"] else ""
-        size = _normalize_value(row.get(column_map["size"])) if column_map["size"] else ""
-        color = _normalize_value(row.get(column_map["color"])) if column_map["color"] else ""
-        care_upc = _normalize_upc(row.get(column_map["care_upc"])) if column_map["care_upc"] else ""
-        hang_upc = _normalize_upc(row.get(column_map["hang_upc"])) if column_map["hang_upc"] else ""
-        generic_upc = _normalize_upc(row.get(column_map["upc"])) if column_map["upc"] else ""
 
-        if not care_upc and generic_upc:
-            care_upc = generic_upc
+def _normalize_upc_column(series: pd.Series) -> pd.Series:
+    """Column-wise :func:`_normalize_upc`; empty cells become ``""``."""
+    digits = series.fillna("").astype(str).str.replace(_NONDIGIT_RE, "", regex=True)
+    return digits.mask(digits.str.len() > 12, digits.str.lstrip("0"))
 
-        rows.append(
-            {
-                "style": style,
-                "size": size,
-                "color": color,
-                "care_upc": care_upc,
-                "hang_upc": hang_upc,
-            }
-        )
 
-    return rows
-
-
-def _match_item(items: list[dict[str, Any]], style: str, size: str, color: str) -> tuple[dict[str, Any] | None, str]:
-    if not items:
-        return None, "none"
-
-    def normalize_item(item: dict[str, Any]) -> dict[str, str]:
-        return {
-            "style": _normalize_value(item.get("style_number")),
-            "size": _normalize_value(item.get("size")),
-            "color": _normalize_value(item.get("color")),
+def read_spreadsheet(file_path: str) -> list[dict[str, Any]]:
+    # Every column is normalized to text, so skip pandas dtype inference;
+    # it also keeps numeric UPC cells from being widened to floats.
+    df = pd.read_excel(file_path, engine="openpyxl", dtype=str)
+    column_map = _map_columns(df.columns.tolist())
+    empty = pd.Series("", index=df.index, dtype=object)
+
+    def column(key: str) -> pd.Series:
+        return df[column_map[key]] if column_map[key] else empty
+
+    care_upc = _normalize_upc_column(column("care_upc"))
+    generic_upc = _normalize_upc_column(column("upc"))
+    out = pd.DataFrame(
+        {
+            "style": _normalize_value_column(column("style")),
+            "size": _normalize_value_column(column("size")),
+            "color": _normalize_value_column(column("color")),
+            "care_upc": care_upc.where(care_upc != "", generic_upc),
+            "hang_upc": _normalize_upc_column(column("hang_upc")),
         }
+    )
+    return out.to_dict(orient="records")
+
+
+# Each tier maps a normalized key to the position of the first matching item.
+MatchIndex = tuple[
+    dict[tuple[str, str, str], int],
+    dict[tuple[str, str], int],
+    dict[tuple[str, str], int],
+    dict[str, int],
+]
+
+ItemKeys = tuple[tuple[str | None, str | None, str | None], ...]
+
+
+def _item_keys(items: list[dict[str, Any]]) -> ItemKeys:
+    fields = ("style_number", "size", "color")
+    return tuple(tuple(None if item.get(f) is None else str(item.get(f)) for f in fields) for item in items)
+
+
+# The same extracted items are validated again whenever a catalog is
+# re-submitted, so indexes are cached on the fields they are built from.
+# They hold positions rather than items, letting equal item lists share an
+# index; callers must not mutate it.
+@lru_cache(maxsize=32)
+def _build_match_index(item_keys: ItemKeys) -> MatchIndex:
+    """Index extracted items by each match tier's normalized key.
+
+    Every tier keeps the first item in list order, which is the one the
+    tiered scan would have returned.
+    """
+    by_style_size_color: dict[tuple[str, str, str], int] = {}
+    by_style_size: dict[tuple[str, str], int] = {}
+    by_style_color: dict[tuple[str, str], int] = {}
+    by_style: dict[str, int] = {}
+    for position, (raw_style, raw_size, raw_color) in enumerate(item_keys):
+        style = _normalize_value(raw_style)
+        if not style:
+            # Every tier requires a style, so these items can never match.
+            continue
+        size = _normalize_value(raw_size)
+        color = _normalize_value(raw_color)
+        by_style_size_color.setdefault((style, size, color), position)
+        by_style_size.setdefault((style, size), position)
+        by_style_color.setdefault((style, color), position)
+        by_style.setdefault(style, position)
+    return by_style_size_color, by_style_size, by_style_color, by_style
+
+
+def _match_item(
+    items: list[dict[str, Any]], index: MatchIndex, style: str, size: str, color: str
+) -> tuple[dict[str, Any] | None, str]:
+    if not style:
+        return None, "none"
+    by_style_size_color, by_style_size, by_style_color, by_style = index
 
-    normalized_items = [(item, normalize_item(item)) for item in items]
-
-    for item, norm in normalized_items:
-        if norm["style"] == style and norm["size"] == size and norm["color"] == color and style:
-            return item, "style+size+color"
+    position = by_style_size_color.get((style, size, color))
+    if position is not None:
+        return items[position], "style+size+color"
 
-    for item, norm in normalized_items:
-        if norm["style"] == style and norm["size"] == size and style:
-            return item, "style+size"
+    position = by_style_size.get((style, size))
+    if position is not None:
+        return items[position], "style+size"
 
-    for item, norm in normalized_items:
-        if norm["style"] == style and norm["color"] == color and style:
-            return item, "style+color"
+    position = by_style_color.get((style, color))
+    if position is not None:
+        return items[position], "style+color"
 
-    for item, norm in normalized_items:
-        if norm["style"] == style and style:
-            return item, "style"
+    position = by_style.get(style)
+    if position is not None:
+        return items[position], "style"
 
     return None, "none"
 
@@ -110,20 +176,32 @@ def validate_rows(
     care_labels: list[dict[str, Any]],
     hang_tags: list[dict[str, Any]],
 ) -> dict[str, Any]:
+    """Match spreadsheet rows to extracted items and compare their UPCs.
+
+    ``rows`` must come from :func:`read_spreadsheet`, whose values are
+    already normalized; only the extracted items are normalized here.
+    """
     results: list[dict[str, Any]] = []
+    care_label_matches = hang_tag_matches = 0
+    care_index = _build_match_index(_item_keys(care_labels))
+    hang_index = _build_match_index(_item_keys(hang_tags))
 
     for row in rows:
-        style = _normalize_value(row.get("style"))
-        size = _normalize_value(row.get("size"))
-        color = _normalize_value(row.get("color"))
+        style = row.get("style", "")
+        size = row.get("size", "")
+        color = row.get("color", "")
 
-        care_item, care_match = _match_item(care_labels, style, size, color)
-        hang_item, hang_match = _match_item(hang_tags, style, size, color)
+        care_item, care_match = _match_item(care_labels, care_index, style, size, color)
+        hang_item, hang_match = _match_item(hang_tags, hang_index, style, size, color)
 
-        care_upc_expected = _normalize_upc(row.get("care_upc"))
-        hang_upc_expected = _normalize_upc(row.get("hang_upc"))
+        care_upc_expected = row.get("care_upc", "")
+        hang_upc_expected = row.get("hang_upc", "")
         care_upc_actual = _normalize_upc(care_item.get("upc") if care_item else "")
         hang_upc_actual = _normalize_upc(hang_item.get("upc") if hang_item else "")
+        care_upc_matches = bool(care_upc_expected and care_upc_actual and care_upc_expected == care_upc_actual)
+        hang_upc_matches = bool(hang_upc_expected and hang_upc_actual and hang_upc_expected == hang_upc_actual)
+        care_label_matches += care_upc_matches
+        hang_tag_matches += hang_upc_matches
 
         results.append(
             {
@@ -132,14 +210,14 @@ def validate_rows(
                     "match": care_match,
                     "upc_expected": care_upc_expected,
                     "upc_actual": care_upc_actual,
-                    "upc_matches": bool(care_upc_expected and care_upc_actual and care_upc_expected == care_upc_actual),
+                    "upc_matches": care_upc_matches,
                     "item": care_item,
                 },
                 "hang_tag": {
                     "match": hang_match,
                     "upc_expected": hang_upc_expected,
                     "upc_actual": hang_upc_actual,
-                    "upc_matches": bool(hang_upc_expected and hang_upc_actual and hang_upc_expected == hang_upc_actual),
+                    "upc_matches": hang_upc_matches,
                     "item": hang_item,
                 },
             }
@@ -147,8 +225,8 @@ def validate_rows(
 
     summary = {
         "rows": len(results),
-        "care_label_matches": sum(1 for item in results if item["care_label"]["upc_matches"]),
-        "hang_tag_matches": sum(1 for item in results if item["hang_tag"]["upc_matches"]),
+        "care_label_matches": care_label_matches,
+        "hang_tag_matches": hang_tag_matches,
     }
 
     return {"summary": summary, "results": results}
@@ -0,0 +1,21 @@
+from app.extractors.carelabel import extract_care_label_info
+
+
+def test_composition_after_rn_line():
+    info = extract_care_label_info("RN# 1234\n95% COTTON\n5% SPANDEX")
+    assert info["composition"] == [
+        {"percent": 95, "material": "COTTON"},
+        {"percent": 5, "material": "SPANDEX"},
+    ]
+
+
+def test_composition_after_size_line():
+    info = extract_care_label_info("Size 8\n60% Cotton 40% Polyester")
+    assert info["composition"] == [
+        {"percent": 60, "material": "Cotton"},
+        {"percent": 40, "material": "Polyester"},
+    ]
+
+
+def test_single_spaced_upc():
+    assert extract_care_label_info("XL\n0 3 6 0 0 0 2 9 1 4 5 2")["upc"] == "036000291452"
@@ -0,0 +1,44 @@
+import random
+
+import fitz
+
+from app.extractors.common import clip_texts, find_upc, normalize_text
+
+
+def _column_rects(page: fitz.Page, columns: int) -> list[fitz.Rect]:
+    width = page.rect.width / columns
+    return [fitz.Rect(i * width, 0, (i + 1) * width, page.rect.height) for i in range(columns)]
+
+
+def test_clip_texts_drops_glyph_past_column_edge():
+    doc = fitz.open()
+    page = doc.new_page(width=612, height=792)
+    rects = _column_rects(page, 8)
+    # The last glyph's box just crosses the column edge but its outline does not.
+    width = fitz.get_text_length("95% COTTON", fontsize=10)
+    page.insert_text((rects[1].x1 - width + 0.17, 100), "95% COTTON", fontsize=10)
+    page.insert_text((rects[2].x1 - 20, 200), "036000291452", fontsize=10)
+
+    assert clip_texts(page, rects) == [page.get_text("text", clip=rect) for rect in rects]
+
+
+def test_clip_texts_matches_clipped_get_text_on_straddling_pages():
+    rng = random.Random(7)
+    words = ["95% COTTON", "5% SPANDEX", "036000291452", "RN# 1234", "Made In China", "XL (16-18)", "Wj"]
+    for _ in range(20):
+        doc = fitz.open()
+        page = doc.new_page(width=612, height=792)
+        for _ in range(30):
+            page.insert_text(
+                (rng.uniform(0, 580), rng.uniform(20, 780)),
+                rng.choice(words),
+                fontsize=rng.choice([6, 8, 10, 14]),
+                fontname=rng.choice(["helv", "tiro", "cour"]),
+            )
+        rects = _column_rects(page, rng.choice([4, 7, 8]))
+        assert clip_texts(page, rects) == [page.get_text("text", clip=rect) for rect in rects]
+
+
+def test_find_upc_joins_single_spaced_digits():
+    for text, upc in (("1 9 8 8 5 4 4 1 3 6 2 3", "198854413623"), ("0 3 6 0 0 0 2 9 1 4 5 2", "036000291452")):
+        assert find_upc(normalize_text(text)) == (upc, upc)
@@ -0,0 +1,38 @@
+import asyncio
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.main import _run_in_pdf_pool, app, lifespan
+
+
+def test_pdf_pool_recovers_after_worker_dies():
+    async def scenario() -> None:
+        async with lifespan(app):
+            broken = app.state.pdf_pool
+            with pytest.raises(BrokenProcessPool):
+                await _run_in_pdf_pool(app, os._exit, 1)
+            assert app.state.pdf_pool is not broken
+            assert await _run_in_pdf_pool(app, abs, -3) == 3
+
+    asyncio.run(scenario())
+
+
+def test_pdf_pool_is_rebuilt_once_for_concurrent_tasks():
+    async def scenario() -> None:
+        async with lifespan(app):
+            broken = app.state.pdf_pool
+            results = await asyncio.gather(
+                _run_in_pdf_pool(app, os._exit, 1),
+                _run_in_pdf_pool(app, abs, -3),
+                return_exceptions=True,
+            )
+            assert isinstance(results[0], BrokenProcessPool)
+            assert results[1] == 3 or isinstance(results[1], BrokenProcessPool)
+            rebuilt = app.state.pdf_pool
+            assert rebuilt is not broken
+            assert await _run_in_pdf_pool(app, abs, -3) == 3
+            assert app.state.pdf_pool is rebuilt
+
+    asyncio.run(scenario())
@@ -0,0 +1,5 @@
+from app.extractors.rfid import extract_tag_info
+
+
+def test_single_spaced_upc():
+    assert extract_tag_info("M (8-10)\n1 9 8 8 5 4 4 1 3 6 2 3")["upc"] == "198854413623"